@@ -2,6 +2,14 @@
 smartsrx - A package for managing reactive functional group SMARTS patterns.
 """
 
+from smartsrx.annotator import AnnotationLimits, AnnotationResult, LatencyHistogram, SmartsRxAnnotator
 from smartsrx.hierarchy_model import ReactiveFunction, ReactiveFunctionDatabase
 
-__all__ = ["ReactiveFunction", "ReactiveFunctionDatabase"]
+__all__ = [
+    "AnnotationLimits",
+    "AnnotationResult",
+    "LatencyHistogram",
+    "ReactiveFunction",
+    "ReactiveFunctionDatabase",
+    "SmartsRxAnnotator",
+]
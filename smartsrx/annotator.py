@@ -0,0 +1,202 @@
+"""
+Bounded SMARTS-RX Annotation of Molecules
+
+This module annotates molecules with SMARTS-RX identifiers while keeping the cost of
+any single molecule bounded. Recursive SMARTS and ring queries can become very slow on
+large macrocycles, peptides and polymer-like SMILES, so the annotator applies
+configurable per-molecule limits before and during matching.
+
+Models:
+    AnnotationLimits: Per-molecule limits on heavy atoms, rings and wall time
+    AnnotationResult: SMARTS-RX identifiers for one molecule, with an optional flag
+    LatencyHistogram: Bucketed per-molecule annotation latencies for export
+
+Classes:
+    SmartsRxAnnotator: Matches molecules against a ReactiveFunctionDatabase
+
+Molecules that exceed a limit are not blocked on; they are returned with a flag
+describing the limit that was hit and, optionally, handed to a slow-lane callback
+(e.g. the `put` method of a separate queue) for processing elsewhere. Unparsable
+SMILES are flagged as well but are not sent to the slow lane.
+
+The wall time limit is checked between SMARTS patterns, so the overrun of a single
+molecule is bounded by the cost of the slowest individual pattern.
+"""
+
+import time
+from bisect import bisect_left
+from typing import Callable, List, Optional, Tuple
+
+from pydantic import BaseModel, Field
+from rdkit import Chem
+
+from smartsrx.hierarchy_model import ReactiveFunctionDatabase
+
+# Flags reported in AnnotationResult.flag
+FLAG_INVALID_SMILES = "invalid_smiles"
+FLAG_MAX_HEAVY_ATOMS = "max_heavy_atoms"
+FLAG_MAX_RINGS = "max_rings"
+FLAG_MAX_SECONDS = "max_seconds"
+
+# Upper bucket bounds (in seconds) for the latency histogram
+DEFAULT_LATENCY_BUCKETS = [0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0]
+
+
+class AnnotationLimits(BaseModel):
+    """
+    Per-molecule limits applied by the SmartsRxAnnotator.
+
+    A limit set to None is disabled.
+
+    Attributes:
+        max_heavy_atoms: Maximum number of heavy atoms a molecule may have
+        max_rings: Maximum number of SSSR rings a molecule may have
+        max_seconds: Maximum wall time in seconds spent matching a molecule
+    """
+
+    max_heavy_atoms: Optional[int] = Field(None, ge=1, description="Maximum number of heavy atoms")
+    max_rings: Optional[int] = Field(None, ge=0, description="Maximum number of rings")
+    max_seconds: Optional[float] = Field(None, gt=0, description="Maximum wall time per molecule in seconds")
+
+
+class AnnotationResult(BaseModel):
+    """
+    Model representing the SMARTS-RX annotation of a single molecule.
+
+    Attributes:
+        smiles: Input SMILES string
+        smartsrx: Sorted list of matching SMARTS-RX identifiers
+        flag: Limit that stopped the annotation, or None if it completed
+        elapsed: Wall time in seconds spent on the molecule
+    """
+
+    smiles: str = Field(..., description="Input SMILES")
+    smartsrx: List[str] = Field(default_factory=list, description="Matching SMARTS-RX identifiers")
+    flag: Optional[str] = Field(None, description="Limit that stopped the annotation")
+    elapsed: float = Field(0.0, description="Wall time in seconds")
+
+    @property
+    def complete(self) -> bool:
+        """Whether all SMARTS patterns were matched against the molecule"""
+        return self.flag is None
+
+
+class LatencyHistogram(BaseModel):
+    """
+    Histogram of per-molecule annotation latencies.
+
+    `counts[i]` holds the number of observations less than or equal to `buckets[i]`
+    and greater than the previous bound; the last entry of `counts` holds the
+    observations above the largest bound.
+    """
+
+    buckets: List[float] = Field(
+        default_factory=lambda: list(DEFAULT_LATENCY_BUCKETS),
+        description="Upper bucket bounds in seconds",
+    )
+    counts: List[int] = Field(default_factory=list, description="Number of observations per bucket")
+    total: int = Field(0, description="Total number of observations")
+    total_seconds: float = Field(0.0, description="Sum of all observations in seconds")
+
+    def model_post_init(self, __context) -> None:
+        self.buckets = sorted(self.buckets)
+        if len(self.counts) != len(self.buckets) + 1:
+            self.counts = [0] * (len(self.buckets) + 1)
+
+    def observe(self, seconds: float) -> None:
+        """Record a single latency observation in seconds"""
+        self.counts[bisect_left(self.buckets, seconds)] += 1
+        self.total += 1
+        self.total_seconds += seconds
+
+
+class SmartsRxAnnotator:
+    """
+    Annotate molecules with SMARTS-RX identifiers under per-molecule limits.
+
+    Args:
+        database: Database providing the SMARTS-RX patterns
+        limits: Per-molecule limits, or None to disable all limits
+        slow_lane: Optional callable receiving every AnnotationResult flagged by a limit
+
+    Example:
+        >>> slow_queue = queue.Queue()
+        >>> annotator = SmartsRxAnnotator(
+        ...     db, AnnotationLimits(max_heavy_atoms=150, max_seconds=0.5), slow_lane=slow_queue.put
+        ... )
+        >>> result = annotator.annotate("C1C(C(O)C)=CC=C(C(O)C)C=1.Cl")
+        >>> print(" ".join(result.smartsrx))
+        >>> print(annotator.histogram.model_dump_json())
+    """
+
+    def __init__(
+        self,
+        database: ReactiveFunctionDatabase,
+        limits: Optional[AnnotationLimits] = None,
+        slow_lane: Optional[Callable[[AnnotationResult], None]] = None,
+    ):
+        # pylint: disable=no-member
+        self.limits = limits or AnnotationLimits()
+        self.slow_lane = slow_lane
+        self.histogram = LatencyHistogram()
+        self._patterns: List[Tuple[str, Chem.Mol]] = []
+        for function in database.data:
+            pattern = Chem.MolFromSmarts(function.smarts)
+            if pattern is None:
+                raise ValueError(f"Invalid SMARTS for {function.specific_type}: {function.smarts}")
+            self._patterns.append((function.specific_type, pattern))
+
+    def _check_size(self, mol: Chem.Mol) -> Optional[str]:
+        """Return the flag of the first size limit exceeded by `mol`, if any"""
+        if self.limits.max_heavy_atoms is not None and mol.GetNumHeavyAtoms() > self.limits.max_heavy_atoms:
+            return FLAG_MAX_HEAVY_ATOMS
+        if self.limits.max_rings is not None and mol.GetRingInfo().NumRings() > self.limits.max_rings:
+            return FLAG_MAX_RINGS
+        return None
+
+    def annotate(self, smiles: str) -> AnnotationResult:
+        """
+        Annotate a single molecule given as SMILES.
+
+        Molecules that cannot be parsed or exceed a size limit are flagged without
+        matching. If the wall time limit is reached, matching stops and the result
+        holds the identifiers found so far together with the `max_seconds` flag.
+
+        Args:
+            smiles: SMILES string of the molecule
+
+        Returns:
+            AnnotationResult for the molecule
+        """
+        # pylint: disable=no-member
+        start = time.perf_counter()
+        matches: List[str] = []
+        flag: Optional[str] = None
+
+        mol = Chem.MolFromSmiles(smiles)
+        if mol is None:
+            flag = FLAG_INVALID_SMILES
+        else:
+            flag = self._check_size(mol)
+
+        if flag is None:
+            deadline = None if self.limits.max_seconds is None else start + self.limits.max_seconds
+            for specific_type, pattern in self._patterns:
+                if deadline is not None and time.perf_counter() > deadline:
+                    flag = FLAG_MAX_SECONDS
+                    break
+                if mol.HasSubstructMatch(pattern):
+                    matches.append(specific_type)
+
+        elapsed = time.perf_counter() - start
+        self.histogram.observe(elapsed)
+
+        result = AnnotationResult(smiles=smiles, smartsrx=sorted(matches), flag=flag, elapsed=elapsed)
+        if flag not in (None, FLAG_INVALID_SMILES) and self.slow_lane is not None:
+            self.slow_lane(result)
+
+        return result
+
+    def annotate_many(self, smiles_list: List[str]) -> List[AnnotationResult]:
+        """Annotate a batch of SMILES strings, see `annotate`"""
+        return [self.annotate(smiles) for smiles in smiles_list]
@@ -0,0 +1,82 @@
+import pytest
+
+from smartsrx import AnnotationLimits, LatencyHistogram, ReactiveFunctionDatabase, SmartsRxAnnotator
+
+
+@pytest.fixture
+def test_db():
+    """Fixture creating a small test database"""
+    lines = [
+        "Acid\tCarboxylicAcid\tAcid_Aromatic\tc[CX3](=[OX1])[OX2H,OX1-]\n",
+        "Alcohol\tPrimaryAlcohol\tAlcohol_Primary\t[CX4;!$(C(O)(O));!$(C([#6]=[#8])O)][OX2H]\n",
+        "Amine\tPrimaryAmine\tAmine_Primary\t[NX3H2][CX4]\n",
+    ]
+    return ReactiveFunctionDatabase.from_lines(lines, "\t", "1.0.0")
+
+
+def test_annotate_without_limits(test_db):
+    """Test that molecules are annotated completely when no limits are set"""
+    annotator = SmartsRxAnnotator(test_db)
+    result = annotator.annotate("OCc1ccc(C(=O)O)cc1")
+    assert result.complete
+    assert result.flag is None
+    assert result.smartsrx == ["Acid_Aromatic", "Alcohol_Primary"]
+    assert result.elapsed >= 0.0
+    assert annotator.histogram.total == 1
+
+
+def test_invalid_smiles(test_db):
+    """Test that unparsable SMILES are flagged but not sent to the slow lane"""
+    slow_lane = []
+    annotator = SmartsRxAnnotator(test_db, slow_lane=slow_lane.append)
+    result = annotator.annotate("not_a_smiles")
+    assert result.flag == "invalid_smiles"
+    assert result.smartsrx == []
+    assert slow_lane == []
+
+
+def test_size_limits(test_db):
+    """Test that molecules over the heavy atom or ring limits are flagged and routed"""
+    slow_lane = []
+    annotator = SmartsRxAnnotator(test_db, AnnotationLimits(max_heavy_atoms=10, max_rings=1), slow_lane.append)
+
+    results = annotator.annotate_many(["NCCO", "CCCCCCCCCCCCN", "NC1CC1C1CC1"])
+    assert [result.flag for result in results] == [None, "max_heavy_atoms", "max_rings"]
+    assert results[0].smartsrx == ["Alcohol_Primary", "Amine_Primary"]
+    assert results[1].smartsrx == []
+    assert [result.smiles for result in slow_lane] == ["CCCCCCCCCCCCN", "NC1CC1C1CC1"]
+    assert annotator.histogram.total == 3
+
+
+def test_time_limit(test_db, monkeypatch):
+    """Test that matching stops once the wall time limit is exceeded"""
+    clock = iter(range(100))
+    monkeypatch.setattr("smartsrx.annotator.time.perf_counter", lambda: float(next(clock)))
+
+    slow_lane = []
+    annotator = SmartsRxAnnotator(test_db, AnnotationLimits(max_seconds=1.5), slow_lane.append)
+    result = annotator.annotate("NCc1ccc(C(=O)O)cc1")
+    assert result.flag == "max_seconds"
+    assert not result.complete
+    assert result.smartsrx == ["Acid_Aromatic"]
+    assert slow_lane == [result]
+
+
+def test_invalid_limits():
+    """Test that limits are validated"""
+    with pytest.raises(ValueError):
+        AnnotationLimits(max_heavy_atoms=0)
+    with pytest.raises(ValueError):
+        AnnotationLimits(max_seconds=0)
+
+
+def test_latency_histogram():
+    """Test bucketing of latency observations"""
+    histogram = LatencyHistogram(buckets=[0.1, 0.01, 1.0])
+    assert histogram.buckets == [0.01, 0.1, 1.0]
+    for seconds in [0.005, 0.01, 0.05, 0.5, 5.0]:
+        histogram.observe(seconds)
+    assert histogram.counts == [2, 1, 1, 1]
+    assert histogram.total == 5
+    assert histogram.total_seconds == pytest.approx(5.565)
+    assert LatencyHistogram.model_validate_json(histogram.model_dump_json()) == histogram